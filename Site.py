@@ -84,11 +84,15 @@ import numpy as np
 import utm
 
 from py_wake.site.xrsite import GlobalWindAtlasSite
+from coordinates import UTMTransform
 
 class Kratos(GlobalWindAtlasSite):
     def __init__(self, lat, long, height, num_points, ti=0.11, roughness=0.01, shear=None):
         self.lat, self.long = lat, long
         self.num_points = num_points
+        # UTM zone of the site center, used for every lat/long <-> x/y conversion of this site
+        self.transform = UTMTransform.from_center(lat, long)
+        self.zone_number, self.zone_letter = self.transform.zone_number, self.transform.zone_letter
         GlobalWindAtlasSite.__init__(self, lat = lat, long = long, height=height, roughness=roughness, ti = ti, shear=shear)
     def initial_coordinates(self):
         """
@@ -107,8 +111,8 @@ class Kratos(GlobalWindAtlasSite):
             lon_turbine[i] = point.longitude
         # lat_turbine = np.array([self.lat-0.004, self.lat-0.003, self.lat -0.002, self.lat - 0.001]) # Initial latitudes for turbines
         # lon_turbine = np.array([self.lon-0.001, self.lon-0.002, self.lon -0.003, self.lon - 0.004]) # Initial latitudes for turbines
-        wt_x, wt_y, zone_number, zone_letter = utm.from_latlon(lat_turbine, lon_turbine)
-        return wt_x, wt_y,zone_number, zone_letter
+        wt_x, wt_y = self.transform.from_latlon(lat_turbine, lon_turbine)
+        return wt_x, wt_y, self.zone_number, self.zone_letter
     # def initial_coordinates(self,num_rows,num_cols, corner_lats, corner_lons, margin_ratio=0.2):
     #     """
     #     Generate turbine positions in a 6x4 grid fully contained within the
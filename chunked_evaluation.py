@@ -0,0 +1,223 @@
+"""
+Created on Mon Oct  19 16:43:50 2026
+
+@author: MIT Wind
+
+Memory-budgeted wind farm evaluation for large farms over the full wd x ws grid.
+
+A single wfm(wt_x, wt_y) call allocates intermediates of shape turbines x turbines x wind directions
+x wind speeds. Here the wd x ws grid is split into chunks sized to a byte budget, each chunk is
+simulated on its own and reduced right away, so only one chunk of intermediates is alive at a time.
+
+Assumptions:
+    The memory of a flow case is measured with tracemalloc, so it follows the wake model used. Two
+    small probe chunks give a first estimate (see bytes_per_flow_case); the first chunk is run at half
+    that size and its measured peak sizes the remaining chunks. Only the probes are discarded work
+    The probabilities are computed once for the full grid and sliced per chunk, so chunked results
+    match the unchunked run (bin sizes are not re-derived from the chunk)
+    float32 intermediates use the PyWake Numpy32 backend; accumulation is always float64
+"""
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from py_wake.utils.numpy_utils import Numpy32
+from metrics import FarmMetrics, reduce_energy
+
+
+def _peak_memory(f, *args, **kwargs):
+    """Run f and return (result, peak bytes allocated above the memory in use before the call)"""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    try:
+        res = f(*args, **kwargs)
+        return res, tracemalloc.get_traced_memory()[1] - before
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def _simulate(wfm, x, y, wd, ws, float32):
+    if float32:
+        with Numpy32():
+            return wfm(x, y, wd=wd, ws=ws, return_simulationResult=False)
+    return wfm(x, y, wd=wd, ws=ws, return_simulationResult=False)
+
+
+def bytes_per_flow_case(wfm, x, y, wd, ws, float32=False, n_probe=32):
+    """
+    Fixed and per flow case memory of a chunk, fitted from two small probe chunks.
+
+    Probe chunks of 1 and n_probe flow cases (from the start of the wd x ws grid) are simulated with
+    tracemalloc. The probe cost does not grow with the grid or the budget.
+
+    Returns
+    -------
+    fixed, per_case : int
+        Peak bytes of a chunk of n flow cases is approximately fixed + n * per_case
+    """
+    wd, ws = np.atleast_1d(wd), np.atleast_1d(ws)
+    _simulate(wfm, x, y, wd[:1], ws[:1], float32)  # warm up caches so they are not counted below
+    peaks = []
+    for n in sorted({1, min(n_probe, len(wd) * len(ws))}):
+        n_ws = min(len(ws), n)
+        n_wd = n // n_ws
+        peaks.append((n_wd * n_ws, _peak_memory(_simulate, wfm, x, y, wd[:n_wd], ws[:n_ws], float32)[1]))
+    (n1, p1), (n2, p2) = peaks[0], peaks[-1]
+    per_case = (p2 - p1) / (n2 - n1) if n2 > n1 else p1
+    return int(max(p1 - per_case, 0)), int(np.ceil(max(per_case, 1)))
+
+
+def evaluate_chunked(wfm, x, y, memory_budget, wd=None, ws=None, float32=False, rated_power=None,
+                     hours_pr_year=24 * 365, normalize_probabilities=False, return_power=False):
+    """
+    Evaluate the wind farm over the wd x ws grid within a memory budget.
+
+    Parameters
+    ----------
+    wfm : py_wake WindFarmModel
+        Wind farm model, e.g. PropagateDownwind(site, turbine, ...) from the notebook
+    x, y : array_like
+        Turbine positions
+    memory_budget : int
+        Byte limit for the simulation intermediates of one chunk plus the accumulated results
+    wd, ws : array_like, optional
+        Wind directions and speeds. Default is the site defaults
+    float32 : bool, optional
+        Compute the chunks with float32 intermediates (roughly halves the memory per flow case)
+    rated_power, hours_pr_year, normalize_probabilities :
+        See metrics.FarmMetrics
+    return_power : bool, optional
+        Also return the power of every turbine and flow case, shape (n_wt, n_wd, n_ws), in W
+
+    Returns
+    -------
+    metrics : metrics.FarmMetrics
+        AEP, wake loss and capacity factor tables, identical to FarmMetrics(wfm(x, y, wd=wd, ws=ws))
+    stats : dict
+        Chunking: wd_chunk and ws_chunk (largest number of flow cases per chunk along each
+        dimension), n_chunks, bytes_per_case used to size the chunks, probe_seconds (time spent in
+        bytes_per_flow_case) and seconds (total)
+    power_ilk : ndarray
+        Only if return_power is True
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    wd, ws = wfm.site.get_defaults(wd, ws)
+    wd, ws = np.atleast_1d(wd), np.atleast_1d(ws)
+    I, L, K = len(x), len(wd), len(ws)
+    h = wfm.windTurbines.get_defaults(I)[0]
+    wt = wfm.windTurbines
+
+    t = time.time()
+    # Probabilities of the full grid, sliced per chunk
+    P_ilk = wfm.site.local_wind(x, y, h, wd=wd, ws=ws).P_ilk
+    if normalize_probabilities:
+        P_ilk = P_ilk / P_ilk.sum((1, 2))[:, None, None]
+    if rated_power is None:
+        rated_power = wt.power(np.arange(0, 50, .1)).max() * 1e-6
+
+    power_ilk = np.zeros((I, L, K), dtype=np.float32 if float32 else np.float64) if return_power else None
+    accumulated = 3 * I * (L + K) * 8 + P_ilk.nbytes + (power_ilk.nbytes if return_power else 0)
+    # 10% headroom for the per-chunk reductions and allocator overhead
+    allowance = .9 * memory_budget - accumulated
+    t_probe = time.time()
+    fixed, per_case = bytes_per_flow_case(wfm, x, y, wd, ws, float32)
+    probe_seconds = time.time() - t_probe
+    if allowance < fixed + per_case:
+        raise ValueError(f"Memory budget of {memory_budget} bytes is too small, a single flow case needs "
+                         f"{(accumulated + fixed + per_case) / .9:.0f} bytes")
+    # The fit from small probes underestimates large chunks, so the first chunk is half the fitted size.
+    # Its measured peak per flow case (fixed overhead included) sizes the remaining chunks
+    n_cases = max(int((allowance - fixed) // per_case) // 2, 1)
+
+    il = np.zeros((3, I, L))
+    ik = np.zeros((3, I, K))
+    n_chunks = 0
+    wd_chunk = ws_chunk = 0
+    l0 = k0 = 0
+    while l0 < L:
+        # Chunks are blocks of whole wd rows if a row fits, otherwise pieces of a single row
+        ws_n = min(K - k0, n_cases)
+        wd_n = max(n_cases // K, 1) if ws_n == K else 1
+        l, k = slice(l0, l0 + wd_n), slice(k0, k0 + ws_n)
+        if n_chunks == 0 and L * K > wd_n * ws_n:
+            res, peak = _peak_memory(_simulate, wfm, x, y, wd[l], ws[k], float32)
+            per_case = max(per_case, int(np.ceil(peak / (len(wd[l]) * ws_n))))
+            n_cases = max(int(allowance // per_case), 1)
+        else:
+            res = _simulate(wfm, x, y, wd[l], ws[k], float32)
+        _, _, power_c, _, localWind, kwargs_ilk = res
+        gross_c = wt.power(ws=localWind.WS_ilk, **wfm.get_wt_kwargs(localWind.TI.ilk(), kwargs_ilk))
+        shape = power_c.shape
+        P_c = np.broadcast_to(P_ilk, (P_ilk.shape[0], L, K))[:, l, k]
+        il_c, ik_c = reduce_energy(np.broadcast_to(gross_c, shape).astype(np.float64),
+                                   power_c.astype(np.float64), P_c, hours_pr_year)
+        il[:, :, l] += il_c
+        ik[:, :, k] += ik_c
+        if return_power:
+            power_ilk[:, l, k] = power_c
+        n_chunks += 1
+        wd_chunk, ws_chunk = max(wd_chunk, len(wd[l])), max(ws_chunk, ws_n)
+        k0 += ws_n
+        if k0 == K:
+            k0, l0 = 0, l0 + wd_n
+        # release this chunk before the next one is simulated
+        del res, power_c, localWind, kwargs_ilk, gross_c, P_c, il_c, ik_c
+
+    stats = {'wd_chunk': wd_chunk, 'ws_chunk': ws_chunk, 'n_chunks': n_chunks, 'bytes_per_case': per_case,
+             'probe_seconds': probe_seconds, 'seconds': time.time() - t}
+    metrics = FarmMetrics.from_reductions(il, ik, np.arange(I), wd, ws, rated_power, hours_pr_year)
+    if return_power:
+        return metrics, stats, power_ilk
+    return metrics, stats
+
+
+def benchmark(wfm, x, y, memory_budgets, wd=None, ws=None, float32=(False, True)):
+    """
+    Peak memory and throughput of evaluate_chunked at different budgets.
+
+    Every configuration is run twice: once untimed under tracemalloc for the peak memory and once
+    without tracing for the timing, so the throughput is not slowed down by the memory tracing.
+
+    Parameters
+    ----------
+    memory_budgets : list of int
+        Budgets to test (bytes). None runs the unchunked wfm(x, y, wd=wd, ws=ws); put it first to use
+        it as reference for aep_deviation (otherwise the first run is the reference)
+    float32 : tuple of bool, optional
+        Precisions to test for every budget
+
+    Returns
+    -------
+    report : pandas.DataFrame
+        One row per run: budget, float32, n_chunks, peak_bytes (tracemalloc), seconds, probe_seconds
+        (memory probes, included in seconds), flow cases per second excluding the probes, net AEP and
+        its relative deviation from the reference run
+    """
+    wd, ws = wfm.site.get_defaults(wd, ws)
+    n_flow_cases = len(np.atleast_1d(wd)) * len(np.atleast_1d(ws))
+    rows = []
+    if None in memory_budgets:
+        peak = _peak_memory(wfm, x, y, wd=wd, ws=ws)[1]
+        t = time.time()
+        sim_res = wfm(x, y, wd=wd, ws=ws)
+        seconds = time.time() - t
+        rows.append({'budget': None, 'float32': False, 'n_chunks': 1, 'peak_bytes': peak, 'seconds': seconds,
+                     'probe_seconds': 0., 'flow_cases_per_s': n_flow_cases / seconds,
+                     'net_aep': FarmMetrics(sim_res).farm()['net_aep'].item()})
+        del sim_res
+    for budget in [b for b in memory_budgets if b is not None]:
+        for f32 in float32:
+            peak = _peak_memory(evaluate_chunked, wfm, x, y, budget, wd, ws, float32=f32)[1]
+            metrics, stats = evaluate_chunked(wfm, x, y, budget, wd, ws, float32=f32)
+            rows.append({'budget': budget, 'float32': f32, 'n_chunks': stats['n_chunks'], 'peak_bytes': peak,
+                         'seconds': stats['seconds'], 'probe_seconds': stats['probe_seconds'],
+                         'flow_cases_per_s': n_flow_cases / (stats['seconds'] - stats['probe_seconds']),
+                         'net_aep': metrics.farm()['net_aep'].item()})
+    report = pd.DataFrame(rows)
+    reference = report['net_aep'].iloc[0]
+    report['aep_deviation'] = (report['net_aep'] - reference) / reference
+    return report
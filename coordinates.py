@@ -0,0 +1,208 @@
+"""
+Created on Mon Oct  19 16:28:03 2026
+
+@author: MIT Wind
+
+Coordinate transforms between the UTM frame used by PyWake/TopFarm and latitude/longitude, and
+streaming export of georeferenced point sets (turbine layouts, flow maps, noise grids).
+
+Assumptions:
+    The whole site is projected in a single UTM zone, the zone of the site center found when the
+    site is constructed. Points that fall in a neighbouring zone (sites straddling a zone boundary)
+    are projected in the site zone as well, so distances stay consistent across the boundary
+    Points are transformed and written in fixed-size chunks so large grids never need a full
+    latitude/longitude copy in memory. The export chunk (rows formatted and written at a time) is
+    smaller than the transform chunk, since the formatted text takes far more memory per point
+"""
+import itertools
+import json
+import numpy as np
+import utm
+
+
+class UTMTransform:
+    def __init__(self, zone_number, zone_letter, chunk_size=1_000_000, center=None):
+        """
+        Parameters
+        ----------
+        zone_number : int
+            UTM zone of the site
+        zone_letter : str
+            Latitude band of the site, only used to decide the hemisphere
+        chunk_size : int, optional
+            Number of points transformed at a time
+        center : (float, float), optional
+            Latitude/longitude of the site center, used to sanity check imported layouts
+        """
+        self.zone_number = zone_number
+        self.zone_letter = zone_letter.upper()
+        self.northern = self.zone_letter >= 'N'
+        self.chunk_size = chunk_size
+        self.center = center
+
+    @classmethod
+    def from_center(cls, lat, lon, **kwargs):
+        """Transform in the zone of the site center"""
+        _, _, zone_number, zone_letter = utm.from_latlon(lat, lon)
+        return cls(zone_number, zone_letter, center=(lat, lon), **kwargs)
+
+    def _chunks(self, n):
+        for start in range(0, n, self.chunk_size):
+            yield slice(start, min(start + self.chunk_size, n))
+
+    def to_latlon(self, x, y):
+        """
+        Convert UTM easting/northing in the site zone to latitude/longitude.
+
+        Returns
+        -------
+        lat, lon : ndarray
+            Same shape as x
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        lat = np.empty(x.shape)
+        lon = np.empty(x.shape)
+        xf, yf, latf, lonf = x.reshape(-1), y.reshape(-1), lat.reshape(-1), lon.reshape(-1)
+        for s in self._chunks(xf.size):
+            # strict=False: points of a site straddling the zone boundary lie outside the nominal easting range
+            latf[s], lonf[s] = utm.to_latlon(xf[s], yf[s], self.zone_number, northern=self.northern,
+                                             strict=False)
+        return lat, lon
+
+    def from_latlon(self, lat, lon):
+        """
+        Convert latitude/longitude to UTM easting/northing, forced into the site zone.
+
+        Returns
+        -------
+        x, y : ndarray
+            Same shape as lat
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        x = np.empty(lat.shape)
+        y = np.empty(lat.shape)
+        latf, lonf, xf, yf = lat.reshape(-1), lon.reshape(-1), x.reshape(-1), y.reshape(-1)
+        for s in self._chunks(latf.size):
+            xf[s], yf[s], _, _ = utm.from_latlon(latf[s], lonf[s], force_zone_number=self.zone_number,
+                                                 force_northern=self.northern)
+        return x, y
+
+    def iter_latlon(self, x, y, grid=False, chunk_size=None, **fields):
+        """
+        Yield (lat, lon, fields) chunk by chunk, where fields holds the matching slice of every
+        extra array (e.g. wind speed of a flow map or sound pressure level of a noise map).
+
+        If grid is True, x and y are the axes of a regular grid and the points are generated chunk
+        by chunk in row-major (y, x) order, so the full grid of coordinates is never built.
+        chunk_size overrides the chunk size of the transform.
+        """
+        x, y = np.asarray(x), np.asarray(y)
+        fields = {k: np.asarray(v) for k, v in fields.items()}
+        n = x.size * y.size if grid else x.size
+        chunk_size = chunk_size or self.chunk_size
+        for s in (slice(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)):
+            if grid:
+                i = np.arange(s.start, s.stop)
+                xs, ys = x[i % x.size], y[i // x.size]
+            else:
+                xs, ys = x.flat[s], y.flat[s]
+            lat, lon = utm.to_latlon(xs, ys, self.zone_number, northern=self.northern, strict=False)
+            # .flat slices without copying the whole (possibly non-contiguous) array
+            yield lat, lon, {k: v.flat[s] for k, v in fields.items()}
+
+
+def export_csv(path, transform, x, y, precision=8, grid=False, chunk_size=100_000, **fields):
+    """
+    Stream a georeferenced point set to CSV with columns latitudes, longitudes, *fields.
+
+    Parameters
+    ----------
+    path : str
+        Output file
+    transform : UTMTransform
+        Transform of the site, e.g. site.transform
+    x, y : array_like
+        UTM coordinates of the points, any shape (flattened)
+    precision : int, optional
+        Number of decimals written for latitude/longitude
+    grid : bool, optional
+        If True, x and y are the axes of a regular grid, see UTMTransform.iter_latlon
+    chunk_size : int, optional
+        Number of rows formatted and written at a time
+    **fields : array_like
+        Extra columns, one value per point (row-major (y, x) for a grid)
+    """
+    names = ['latitudes', 'longitudes', *fields]
+    with open(path, 'w') as f:
+        f.write(','.join(names) + '\n')
+        fmt = ['%%.%df' % precision] * 2 + ['%.10g'] * len(fields)
+        for lat, lon, values in transform.iter_latlon(x, y, grid, chunk_size, **fields):
+            np.savetxt(f, np.column_stack([lat, lon, *values.values()]), delimiter=',', fmt=fmt)
+
+
+def _json_values(v):
+    """JSON literals of a chunk of property values. Non-finite floats are not valid JSON, write null"""
+    if v.dtype.kind == 'f':
+        literals = ['%.10g' % value for value in v.tolist()]
+        for i in np.flatnonzero(~np.isfinite(v)):
+            literals[i] = 'null'
+        return literals
+    if v.dtype.kind == 'b':
+        return ['true' if value else 'false' for value in v.tolist()]
+    if v.dtype.kind in 'iu':
+        return [str(value) for value in v.tolist()]
+    return [json.dumps(value) for value in v.tolist()]
+
+
+def export_geojson(path, transform, x, y, precision=8, grid=False, chunk_size=100_000, **fields):
+    """
+    Stream a georeferenced point set to a GeoJSON FeatureCollection of Points, with fields as
+    feature properties. Non-finite values are written as null. See export_csv for the parameters.
+    """
+    # One format string per feature; the property values are formatted column by column
+    feature = ('{"type": "Feature", "geometry": {"type": "Point", "coordinates": [%%.%df, %%.%df]}, '
+               % (precision, precision)) + '"properties": {' + ', '.join(
+                   json.dumps(name).replace('%', '%%') + ': %s' for name in fields) + '}}'
+    first = True
+    with open(path, 'w') as f:
+        f.write('{"type": "FeatureCollection", "features": [\n')
+        for lat, lon, values in transform.iter_latlon(x, y, grid, chunk_size, **fields):
+            rows = zip(lon.tolist(), lat.tolist(), *(_json_values(v) for v in values.values()))
+            if len(lon):
+                f.write(('' if first else ',\n') + ',\n'.join(feature % row for row in rows))
+                first = False
+        f.write('\n]}\n')
+
+
+def export_points(path, transform, x, y, precision=8, grid=False, chunk_size=100_000, **fields):
+    """Export to CSV or GeoJSON depending on the file extension"""
+    if path.lower().endswith(('.geojson', '.json')):
+        return export_geojson(path, transform, x, y, precision, grid, chunk_size, **fields)
+    return export_csv(path, transform, x, y, precision, grid, chunk_size, **fields)
+
+
+def export_flow_map(path, transform, flow_map, variable='WS_eff', precision=8, chunk_size=100_000):
+    """
+    Export a single wd/ws PyWake flow map (sim_res.flow_map(...)) point by point.
+    """
+    values = getattr(flow_map, variable).squeeze().transpose('y', 'x').values
+    return export_points(path, transform, flow_map.x.values, flow_map.y.values, precision, grid=True,
+                         chunk_size=chunk_size, **{variable: values})
+
+
+def export_grid(path, transform, grid, precision=8, chunk_size=100_000):
+    """
+    Export a gridded xarray.DataArray with dims (y, x[, ...]) such as a noise_map result. Every
+    value of the trailing dimensions (e.g. wd) becomes its own column.
+    """
+    grid = grid.transpose('y', 'x', ...)
+    name = grid.name or 'value'
+    extra = grid.dims[2:]
+    values = grid.values.reshape(len(grid.y), len(grid.x), -1)
+    labels = itertools.product(*[grid[d].values for d in extra])
+    fields = {'_'.join([name] + ['%s%g' % (d, v) for d, v in zip(extra, label)]): values[..., i]
+              for i, label in enumerate(labels)}
+    return export_points(path, transform, grid.x.values, grid.y.values, precision, grid=True,
+                         chunk_size=chunk_size, **fields)
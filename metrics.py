@@ -0,0 +1,127 @@
+"""
+Created on Mon Oct  19 16:33:12 2026
+
+@author: MIT Wind
+
+Farm performance metrics (gross/net AEP, wake loss and capacity factor) from a single PyWake
+simulation result.
+
+The wt x wd x ws arrays of the simulation result are read once. Gross energy, net energy and
+hours are stacked into one array and reduced to the (wt, wd) and (wt, ws) marginals in one pass;
+every table (farm, per turbine, per sector, per wind speed bin) is derived from these cached
+marginals, so follow-up queries do not touch the full result again.
+
+Definitions:
+    gross AEP: power at the free-stream wind speed at each turbine (no wake loss), GWh
+    net AEP: power at the wake-affected wind speed, GWh
+    wake loss: (gross - net) / gross, %
+    capacity factor: net AEP / (rated power x hours), %. For the farm and per turbine the hours are
+    the hours of the year (as in the notebook); per sector and per wind speed bin they are the hours
+    that sector or bin occurs, relative to the capacity of the whole farm
+"""
+import numpy as np
+import pandas as pd
+
+
+def reduce_energy(gross_ilk, power_ilk, P_ilk, hours_pr_year=24 * 365):
+    """
+    Reduce gross power, net power (W) and probability of every turbine and flow case to the
+    (wt, wd) and (wt, ws) marginals of [gross GWh, net GWh, hours].
+
+    Returns
+    -------
+    il, ik : ndarray
+        Shape (3, n_wt, n_wd) and (3, n_wt, n_ws)
+    """
+    hours_ilk = np.broadcast_to(P_ilk * hours_pr_year, np.shape(power_ilk))
+    e = np.stack([gross_ilk * hours_ilk * 1e-9, power_ilk * hours_ilk * 1e-9, hours_ilk])
+    return e.sum(3), e.sum(2)
+
+
+class FarmMetrics:
+    def __init__(self, sim_res, rated_power=None, hours_pr_year=24 * 365, normalize_probabilities=False):
+        """
+        Parameters
+        ----------
+        sim_res : py_wake SimulationResult
+            Result of wfm(wt_x, wt_y) over the full wd x ws grid, e.g. sim_res_op in the notebook
+        rated_power : float, optional
+            Rated power of a turbine (MW). Default is the maximum of the power curve
+        hours_pr_year : float, optional
+            Hours per year
+        normalize_probabilities : bool, optional
+            See SimulationResult.aep
+        """
+        power_ilk = sim_res.Power.ilk()
+        shape = power_ilk.shape
+        P_ilk = sim_res.P.ilk(shape)
+        if normalize_probabilities:
+            P_ilk = P_ilk / P_ilk.sum((1, 2))[:, None, None]
+        gross_ilk = sim_res.windFarmModel.windTurbines.power(sim_res.WS.ilk(shape), **sim_res.wt_kwargs)
+        if rated_power is None:
+            rated_power = sim_res.windFarmModel.windTurbines.power(np.arange(0, 50, .1)).max() * 1e-6
+
+        il, ik = reduce_energy(gross_ilk, power_ilk, P_ilk, hours_pr_year)
+        self._set(il, ik, sim_res.wt.values, sim_res.wd.values, sim_res.ws.values, rated_power, hours_pr_year)
+
+    @classmethod
+    def from_reductions(cls, il, ik, wt, wd, ws, rated_power, hours_pr_year=24 * 365):
+        """
+        Metrics from (wt, wd) and (wt, ws) reductions accumulated elsewhere, e.g. chunk by chunk in
+        chunked_evaluation. il and ik have shape (3, n_wt, n_wd) and (3, n_wt, n_ws), see reduce_energy.
+        """
+        self = cls.__new__(cls)
+        self._set(il, ik, wt, wd, ws, rated_power, hours_pr_year)
+        return self
+
+    def _set(self, il, ik, wt, wd, ws, rated_power, hours_pr_year):
+        self._il = il
+        self._ik = ik
+        self.rated_power = rated_power
+        self.hours_pr_year = hours_pr_year
+        self.wt = wt
+        self.wd = wd
+        self.ws = ws
+        self._tables = {}
+
+    def _table(self, e, index, hours=None):
+        gross, net = e[0], e[1]
+        hours = e[2] if hours is None else hours
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({
+                'gross_aep': gross,
+                'net_aep': net,
+                'wake_loss': np.where(gross > 0, (gross - net) / gross * 100, 0.),
+                'capacity_factor': net / (self.rated_power * hours * 1e-3) * 100,
+            }, index=index)
+
+    def farm(self):
+        """Farm totals, one row"""
+        if 'farm' not in self._tables:
+            self._tables['farm'] = self._table(self._il.sum((1, 2))[:, None], pd.Index(['farm']),
+                                                hours=len(self.wt) * self.hours_pr_year)
+        return self._tables['farm']
+
+    def per_turbine(self):
+        """One row per turbine"""
+        if 'wt' not in self._tables:
+            self._tables['wt'] = self._table(self._il.sum(2), pd.Index(self.wt, name='wt'),
+                                              hours=self.hours_pr_year)
+        return self._tables['wt']
+
+    def per_sector(self):
+        """One row per wind direction, summed over all turbines"""
+        if 'wd' not in self._tables:
+            self._tables['wd'] = self._table(self._il.sum(1), pd.Index(self.wd, name='wd'))
+        return self._tables['wd']
+
+    def per_ws(self):
+        """One row per wind speed bin, summed over all turbines"""
+        if 'ws' not in self._tables:
+            self._tables['ws'] = self._table(self._ik.sum(1), pd.Index(self.ws, name='ws'))
+        return self._tables['ws']
+
+    def table(self):
+        """All levels in one table indexed by (level, label)"""
+        tables = {'farm': self.farm(), 'wt': self.per_turbine(), 'wd': self.per_sector(), 'ws': self.per_ws()}
+        return pd.concat({k: v.set_axis(v.index.astype(str)) for k, v in tables.items()}, names=['level', 'label'])
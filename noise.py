@@ -0,0 +1,154 @@
+"""
+Created on Mon Oct  19 16:25:42 2026
+
+@author: MIT Wind
+
+Noise propagation from the wind farm to a receiver grid or a list of shoreline receptors.
+
+Assumptions:
+    Each turbine is a point source at hub height whose A-weighted sound power level depends only on
+    the effective wind speed at the turbine (taken from the PyWake simulation result)
+    Geometric spreading over a sphere: A_div = 20*log10(d) + 11 dB (ISO 9613-2)
+    Atmospheric absorption is a single broadband coefficient in dB/km (default is the ISO 9613-2 value
+    at 500 Hz, 10 degC, 70% relative humidity)
+    No ground effect, barriers or wind direction dependent refraction. The wind direction only enters
+    through the wake-affected wind speed at each turbine
+    Levels from all turbines are summed energetically at every receiver
+"""
+import numpy as np
+import xarray as xr
+
+
+# Generic A-weighted sound power curve for a 4-5 MW class turbine (dB(A) re 1 pW)
+ws_table = np.array([3., 4., 5., 6., 7., 8., 9., 10., 11., 12.])
+lw_table = np.array([94., 96., 99., 102., 104.5, 105.5, 106., 106., 106., 106.])
+
+
+def sound_power_level(ws, ws_table=ws_table, lw_table=lw_table, cut_in_ws=None, cut_out_ws=None):
+    """
+    Sound power level of a turbine as a function of the wind speed at the turbine.
+
+    Parameters
+    ----------
+    ws : array_like
+        Wind speed at the turbines (m/s)
+    ws_table, lw_table : array_like
+        Tabulated sound power curve. Wind speeds above the table are held at the last level
+    cut_in_ws, cut_out_ws : float, optional
+        Outside [cut_in_ws, cut_out_ws) the turbine is parked and does not emit (-inf dB)
+
+    Returns
+    -------
+    lw : ndarray
+        Sound power level (dB(A)) with the same shape as ws
+    """
+    ws = np.asarray(ws, dtype=np.float64)
+    lw = np.interp(ws, ws_table, lw_table)
+    if cut_in_ws is not None:
+        lw = np.where(ws < cut_in_ws, -np.inf, lw)
+    if cut_out_ws is not None:
+        lw = np.where(ws >= cut_out_ws, -np.inf, lw)
+    return lw
+
+
+def sound_pressure_level(wt_x, wt_y, lw, rec_x, rec_y, hub_height, receiver_height=4.,
+                         alpha=1.9, tile_size=10000):
+    """
+    Summed sound pressure level at every receiver.
+
+    The receivers are processed in tiles of tile_size points, so the largest temporary array is
+    tile_size x n_wt regardless of the size of the receiver grid.
+
+    Parameters
+    ----------
+    wt_x, wt_y : array_like
+        Turbine positions (m), shape (n_wt,)
+    lw : array_like
+        Sound power level of every turbine (dB(A)), shape (n_wt,) or (n_wt, n_cases),
+        e.g. one column per wind direction
+    rec_x, rec_y : array_like
+        Receiver positions (m), shape (n_rec,)
+    hub_height : float or array_like
+        Source height of every turbine (m)
+    receiver_height : float, optional
+        Receiver height above ground/sea level (m)
+    alpha : float, optional
+        Atmospheric absorption coefficient (dB/km)
+    tile_size : int, optional
+        Number of receivers evaluated at a time
+
+    Returns
+    -------
+    lp : ndarray
+        Sound pressure level (dB(A)), shape (n_rec,) or (n_rec, n_cases)
+    """
+    wt_x = np.asarray(wt_x, dtype=np.float64)
+    wt_y = np.asarray(wt_y, dtype=np.float64)
+    rec_x = np.asarray(rec_x, dtype=np.float64).ravel()
+    rec_y = np.asarray(rec_y, dtype=np.float64).ravel()
+    dz2 = (np.broadcast_to(hub_height, wt_x.shape) - receiver_height)**2
+    lw = np.asarray(lw, dtype=np.float64)
+    squeeze = lw.ndim == 1
+    # Source intensities, (n_wt, n_cases). Parked turbines (-inf dB) contribute zero
+    w = 10**(lw.reshape(len(wt_x), -1) / 10)
+
+    lp = np.empty((len(rec_x), w.shape[1]))
+    for start in range(0, len(rec_x), tile_size):
+        end = start + tile_size
+        d = np.sqrt((rec_x[start:end, None] - wt_x)**2 + (rec_y[start:end, None] - wt_y)**2 + dz2)
+        d = np.maximum(d, 1.)
+        attenuation = 20 * np.log10(d) + 11 + alpha * d / 1000  # (tile, n_wt)
+        with np.errstate(divide='ignore'):
+            lp[start:end] = 10 * np.log10(10**(-attenuation / 10) @ w)
+    return lp[:, 0] if squeeze else lp
+
+
+def noise_map(sim_res, x, y=None, ws=8, ws_table=ws_table, lw_table=lw_table, receiver_height=4.,
+              alpha=1.9, tile_size=10000):
+    """
+    Per-wind-direction noise map of a simulated wind farm.
+
+    The sound power of every turbine is taken from its wake-affected wind speed (WS_eff) at the
+    free-stream wind speed closest to ws, so waked turbines are quieter than free-stream ones.
+    Turbines that produce no power at that wind speed are treated as parked and silent.
+
+    Parameters
+    ----------
+    sim_res : py_wake SimulationResult
+        Result of wfm(wt_x, wt_y), e.g. sim_res_op in the notebook
+    x, y : array_like
+        If y is given, x and y are the axes of a regular receiver grid. If y is None, x is a
+        (n_rec, 2) array of receptor positions (e.g. shoreline points)
+    ws : float, optional
+        Free-stream wind speed of the map (m/s)
+    ws_table, lw_table : array_like, optional
+        Sound power curve, see sound_power_level
+    receiver_height, alpha, tile_size :
+        See sound_pressure_level
+
+    Returns
+    -------
+    lp : xarray.DataArray
+        Sound pressure level (dB(A)) with dims (y, x, wd) for a grid or (i, wd) for receptors
+    """
+    sim_ws = sim_res.sel(ws=ws, method='nearest')
+    ws_eff = sim_ws.WS_eff.transpose('wt', 'wd').values
+    # Turbines that produce no power (below cut-in or above cut-out) are parked and silent
+    lw = np.where(sim_ws.Power.transpose('wt', 'wd').values > 0,
+                  sound_power_level(ws_eff, ws_table, lw_table), -np.inf)
+    wd = sim_ws.wd.values
+
+    if y is None:
+        receptors = np.asarray(x, dtype=np.float64)
+        lp = sound_pressure_level(sim_res.x.values, sim_res.y.values, lw, receptors[:, 0], receptors[:, 1],
+                                  sim_res.h.values, receiver_height, alpha, tile_size)
+        return xr.DataArray(lp, dims=('i', 'wd'),
+                            coords={'x': ('i', receptors[:, 0]), 'y': ('i', receptors[:, 1]), 'wd': wd},
+                            name='LP', attrs={'units': 'dB(A)', 'ws': ws})
+
+    x, y = np.asarray(x), np.asarray(y)
+    X, Y = np.meshgrid(x, y)
+    lp = sound_pressure_level(sim_res.x.values, sim_res.y.values, lw, X, Y,
+                              sim_res.h.values, receiver_height, alpha, tile_size)
+    return xr.DataArray(lp.reshape(len(y), len(x), len(wd)), dims=('y', 'x', 'wd'),
+                        coords={'x': x, 'y': y, 'wd': wd}, name='LP', attrs={'units': 'dB(A)', 'ws': ws})
@@ -0,0 +1,262 @@
+"""
+Created on Mon Oct  19 16:31:56 2026
+
+@author: MIT Wind
+
+Reusable layout optimization problem for the Kratos site.
+
+The TopFarm problem (OpenMDAO setup and model checks) is built once and re-run with new initial
+layouts or boundary vertices. Every driver iteration is appended to a compact binary history file,
+so a killed run can resume from its last iterate (opt-in, optimize(resume=True)) and later runs can
+warm start from the best recorded layout or from an exported turbine_location.csv. A run that does
+not resume starts a new history file.
+
+History file format (little endian float64 unless noted):
+    header : int64 n_wt, int64 hash of the boundary vertices
+    rows   : [cost, constraint_violation, x_1..x_n_wt, y_1..y_n_wt]
+    A row that was only partially written when a run was killed is ignored on load.
+"""
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+from topfarm import TopFarmProblem
+from topfarm.easy_drivers import EasyScipyOptimizeDriver
+from topfarm.plotting import NoPlot
+from topfarm.recorders import TopFarmListRecorder
+from topfarm.cost_models.py_wake_wrapper import PyWakeAEPCostModelComponent
+from topfarm.constraint_components.boundary import XYBoundaryConstraint
+from coordinates import UTMTransform
+
+
+def boundary_hash(boundary):
+    """int64 hash of boundary vertices (rounded to mm), 0 if there is no boundary"""
+    if boundary is None:
+        return 0
+    data = np.round(np.asarray(boundary, dtype=float), 3).astype('<f8').tobytes()
+    return int.from_bytes(hashlib.sha1(data).digest()[:8], 'little', signed=True)
+
+
+class HistoryRecorder(TopFarmListRecorder):
+    def __init__(self, path, n_wt, boundary=None):
+        """
+        Parameters
+        ----------
+        path : str
+            History file
+        n_wt : int
+            Number of wind turbines
+        boundary : array_like, optional
+            Boundary vertices of the problem, stored as a hash in the header
+        """
+        TopFarmListRecorder.__init__(self)
+        self.path = path
+        self.n_wt = n_wt
+        self.boundary_hash = boundary_hash(boundary)
+
+    def start(self, resume=False):
+        """
+        Start a new history file, or check that the existing one was recorded for the same number of
+        turbines and boundary if resume is True.
+        """
+        if resume and os.path.exists(self.path) and os.path.getsize(self.path) >= 16:
+            n_wt, hash_ = read_history_header(self.path)
+            if n_wt != self.n_wt:
+                raise ValueError(f"{self.path} holds layouts of {n_wt} turbines, expected {self.n_wt}")
+            if hash_ != self.boundary_hash:
+                raise ValueError(f"{self.path} was recorded with a different boundary, run with resume=False")
+            return
+        with open(self.path, 'wb') as f:
+            np.array([self.n_wt, self.boundary_hash], dtype='<i8').tofile(f)
+
+    def record_iteration_driver(self, recording_requester, data, metadata):
+        TopFarmListRecorder.record_iteration_driver(self, recording_requester, data, metadata)
+        if not os.path.exists(self.path):
+            self.start()
+        rec = self.driver_iteration_dict
+        violation = rec['constraint_violation'][-1] if 'constraint_violation' in rec else 0.
+        row = np.r_[np.ravel(rec['cost'][-1])[:1], np.ravel(violation)[:1], rec['x'][-1], rec['y'][-1]]
+        with open(self.path, 'ab') as f:
+            row.astype('<f8').tofile(f)
+            f.flush()
+
+
+def read_history_header(path):
+    """Number of turbines and boundary hash of a history file"""
+    n_wt, hash_ = np.fromfile(path, dtype='<i8', count=2)
+    return int(n_wt), int(hash_)
+
+
+def load_history(path):
+    """
+    Load an iteration history.
+
+    Returns
+    -------
+    cost, violation : ndarray
+        Objective and constraint violation of every recorded iteration, shape (n_iter,)
+    x, y : ndarray
+        Layout of every recorded iteration, shape (n_iter, n_wt)
+    """
+    n_wt = read_history_header(path)[0]
+    data = np.fromfile(path, dtype='<f8', offset=16)
+    n_col = 2 + 2 * n_wt
+    data = data[:len(data) // n_col * n_col].reshape(-1, n_col)
+    return data[:, 0], data[:, 1], data[:, 2:2 + n_wt], data[:, 2 + n_wt:]
+
+
+def last_layout(path):
+    """Layout of the last recorded iteration, or None if the history is empty"""
+    _, _, x, y = load_history(path)
+    if len(x) == 0:
+        return None
+    return x[-1], y[-1]
+
+
+def best_layout(path, tol=1e-6):
+    """
+    Recorded layout with the lowest cost among the feasible iterations (constraint violation <= tol).
+    If no iteration is feasible, the least violating one is returned. None if the history is empty.
+    """
+    cost, violation, x, y = load_history(path)
+    if len(x) == 0:
+        return None
+    feasible = violation <= tol
+    i = np.argmin(np.where(feasible, cost, np.inf)) if feasible.any() else np.argmin(violation)
+    return x[i], y[i]
+
+
+def load_layout_csv(path, transform, zone=None, boundary=None, max_distance=20e3):
+    """
+    Read a layout exported to turbine_location.csv and convert it to UTM x, y of the site.
+
+    Parameters
+    ----------
+    path : str
+        CSV file with latitudes and longitudes columns
+    transform : UTMTransform
+        Transform of the site, e.g. site.transform
+    zone : (int, str), optional
+        UTM zone the file was written in, if not the site zone. Files exported before the site
+        transform existed were written with utm.to_latlon(x, y, 10, "S"), read them with zone=(10, "S")
+    boundary : array_like, optional
+        Boundary vertices (n, 2) in UTM x, y. Default is the site center of the transform
+    max_distance : float, optional
+        Largest distance (m) of a turbine from the boundary (bounding box) or site center
+
+    Returns
+    -------
+    x, y : ndarray
+        Layout in the UTM frame of the site
+    """
+    frame = pd.read_csv(path)
+    reader = transform if zone is None else UTMTransform(*zone)
+    x, y = reader.from_latlon(frame['latitudes'].values, frame['longitudes'].values)
+
+    if boundary is None:
+        if transform.center is None:
+            raise ValueError("Pass the boundary vertices or a transform with a site center to check the layout")
+        boundary = np.array([transform.from_latlon(*transform.center)])
+    boundary = np.asarray(boundary, dtype=float)
+    # distance of every turbine to the bounding box of the boundary (zero inside)
+    dx = np.maximum.reduce([boundary[:, 0].min() - x, x - boundary[:, 0].max(), np.zeros_like(x)])
+    dy = np.maximum.reduce([boundary[:, 1].min() - y, y - boundary[:, 1].max(), np.zeros_like(y)])
+    distance = np.hypot(dx, dy).max()
+    if distance > max_distance:
+        raise ValueError(f"Layout in {path} is {distance / 1e3:.0f} km from the site. If it was written in "
+                         f"another UTM zone, pass zone=(zone_number, zone_letter)")
+    return x, y
+
+
+class LayoutProblem:
+    def __init__(self, wfm, wt_x, wt_y, constraints, driver=None, plot_comp=None, history=None, **kwargs):
+        """
+        Parameters
+        ----------
+        wfm : py_wake WindFarmModel
+            Wind farm model used in the AEP objective
+        wt_x, wt_y : array_like
+            Initial layout, e.g. from site.initial_coordinates()
+        constraints : list
+            TopFarm constraints, e.g. hull_constraints(...) from the notebook
+        driver : topfarm driver, optional
+            Default is EasyScipyOptimizeDriver()
+        plot_comp : topfarm plot component, optional
+            Default is no plotting
+        history : str, optional
+            Iteration history file, see module docstring. It is started anew by every run that does
+            not resume
+        **kwargs :
+            Passed to PyWakeAEPCostModelComponent (e.g. wd, ws)
+        """
+        self.n_wt = len(wt_x)
+        self.constraints = constraints
+        self.history = history
+        self.recorder = HistoryRecorder(history, self.n_wt, self._boundary()) if history else None
+        self.tf = TopFarmProblem(
+            design_vars={'x': np.asarray(wt_x, dtype=float), 'y': np.asarray(wt_y, dtype=float)},
+            cost_comp=PyWakeAEPCostModelComponent(wfm, self.n_wt, **kwargs),
+            driver=driver or EasyScipyOptimizeDriver(),
+            constraints=constraints,
+            plot_comp=plot_comp or NoPlot(),
+            additional_recorders=[self.recorder] if history else None,
+        )
+
+    def _boundary(self):
+        constr = next((c for c in self.constraints if isinstance(c, XYBoundaryConstraint)), None)
+        return None if constr is None else constr.boundary
+
+    def set_boundary(self, vertices):
+        """
+        Replace the vertices of the convex hull boundary without rebuilding the problem.
+        The new hull must have the same number of vertices as the current one.
+        """
+        constr = next(c for c in self.constraints if isinstance(c, XYBoundaryConstraint))
+        comp = constr.boundary_comp
+        n_vertices = comp.nVertices
+        comp.calculate_boundary_and_normals(np.asarray(vertices, dtype=float))
+        if comp.nVertices != n_vertices:
+            raise ValueError(f"New boundary has {comp.nVertices} hull vertices, the problem was set up with {n_vertices}")
+        # The constraint Jacobian and output template are cached from the old hull normals
+        comp.calculate_gradients()
+        comp.zeros = np.zeros([comp.n_wt, comp.nVertices])
+        comp.xy_boundary = np.r_[comp.xy_boundary, comp.xy_boundary[:1]]
+        constr.boundary = comp.xy_boundary
+        self.tf['xy_boundary'] = comp.xy_boundary
+
+        # Design variable bounds follow the bounding box of the boundary (see XYBoundaryConstraint)
+        for k, lower, upper in zip('xy', comp.xy_boundary.min(0), comp.xy_boundary.max(0)):
+            for meta in (self.tf.model._design_vars[k], self.tf.driver._designvars[k]):
+                adder, scaler = meta['total_adder'] or 0., meta['total_scaler'] or 1.
+                meta['lower'] = (lower + adder) * scaler
+                meta['upper'] = (upper + adder) * scaler
+        if self.recorder:
+            self.recorder.boundary_hash = boundary_hash(vertices)
+
+    def optimize(self, wt_x=None, wt_y=None, resume=False, disp=False):
+        """
+        Run the optimization.
+
+        Parameters
+        ----------
+        wt_x, wt_y : array_like, optional
+            Initial layout. Default is the current state of the problem
+        resume : bool, optional
+            Continue a killed run from the last iterate in the history file (if any) and keep appending
+            to it. Raises ValueError if the history was recorded for another number of turbines or
+            another boundary. Default is a new run that starts a new history file
+
+        Returns
+        -------
+        cost, state, recorder : see TopFarmProblem.optimize
+        """
+        if self.recorder:
+            self.recorder.start(resume)
+            if resume:
+                wt_x, wt_y = last_layout(self.history) or (wt_x, wt_y)
+        state = {}
+        if wt_x is not None:
+            state['x'] = np.asarray(wt_x, dtype=float)
+        if wt_y is not None:
+            state['y'] = np.asarray(wt_y, dtype=float)
+        return self.tf.optimize(state, disp=disp)